@@ -5,7 +5,8 @@ pkgs.mkShell {
     pkgs.python3
     pkgs.python3Packages.pip
     pkgs.python3Packages.pyside6
-    pkgs.python3Packages.pydbus
+    pkgs.python3Packages.numpy
+    pkgs.python3Packages.pygobject3
   ];
 
   shellHook = ''
@@ -8,33 +8,38 @@ PySide версия для универсальной кроссплатформ
 import sys
 import os
 import platform
-import subprocess
-import json
-import urllib.request
-import urllib.parse
 import threading
 import time
-import random
-import math
+import hashlib
+import logging
+from collections import OrderedDict
 from pathlib import Path
-from io import BytesIO
+from types import MappingProxyType
+
+import numpy as np
 
 # PySide6 импорты
 try:
     from PySide6.QtWidgets import *
     from PySide6.QtCore import *
     from PySide6.QtGui import *
+    from PySide6.QtNetwork import *
     PYSIDE_VERSION = 6
 except ImportError:
     try:
         from PySide2.QtWidgets import *
         from PySide2.QtCore import *
         from PySide2.QtGui import *
+        from PySide2.QtNetwork import *
         PYSIDE_VERSION = 2
     except ImportError:
         print("❌ PySide не найден! Установите: pip install PySide6")
         sys.exit(1)
 
+# Ошибки пишутся через logging: сообщение форматируется, только если
+# уровень включён, и вывод можно перенаправить или заглушить
+log = logging.getLogger("spotify_mini_player")
+
 # Определение операционной системы
 IS_WINDOWS = platform.system() == "Windows"
 IS_LINUX = platform.system() == "Linux"
@@ -42,11 +47,11 @@ IS_LINUX = platform.system() == "Linux"
 # Импорты для Linux (MPRIS)
 if IS_LINUX:
     try:
-        import pydbus
+        from gi.repository import Gio, GLib
         MPRIS_AVAILABLE = True
     except ImportError:
         MPRIS_AVAILABLE = False
-        print("⚠️  pydbus не найден, установите: pip install pydbus")
+        print("⚠️  PyGObject не найден, установите: pip install PyGObject")
 else:
     MPRIS_AVAILABLE = False
 
@@ -73,10 +78,86 @@ else:
     WINDOWS_MEDIA_AVAILABLE = False
     WINDOWS_COM_AVAILABLE = False
 
-class MediaController:
+# Win32 API через ctypes (окно Spotify для COM-контроллера)
+if IS_WINDOWS:
+    import ctypes
+    from ctypes import wintypes
+    
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+    
+    WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    WINEVENTPROC = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                      wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+    user32.SetWinEventHook.restype = wintypes.HANDLE
+    user32.SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WINEVENTPROC,
+                                       wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+    user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    OBJID_WINDOW = 0
+    INPUT_KEYBOARD = 1
+    KEYEVENTF_KEYUP = 0x0002
+    
+    class MOUSEINPUT(ctypes.Structure):
+        _fields_ = [('dx', wintypes.LONG), ('dy', wintypes.LONG), ('mouseData', wintypes.DWORD),
+                    ('dwFlags', wintypes.DWORD), ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+    
+    class KEYBDINPUT(ctypes.Structure):
+        _fields_ = [('wVk', wintypes.WORD), ('wScan', wintypes.WORD), ('dwFlags', wintypes.DWORD),
+                    ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+    
+    class HARDWAREINPUT(ctypes.Structure):
+        _fields_ = [('uMsg', wintypes.DWORD), ('wParamL', wintypes.WORD), ('wParamH', wintypes.WORD)]
+    
+    class INPUT(ctypes.Structure):
+        # Объединение нужно целиком: SendInput проверяет размер структуры
+        class _INPUT(ctypes.Union):
+            _fields_ = [('mi', MOUSEINPUT), ('ki', KEYBDINPUT), ('hi', HARDWAREINPUT)]
+        _anonymous_ = ('input',)
+        _fields_ = [('type', wintypes.DWORD), ('input', _INPUT)]
+
+# Неизменяемые шаблоны состояний без трека: контроллеры возвращают
+# ссылки на них, а не собирают одинаковые словари при каждом опросе
+_WAITING_INFO = MappingProxyType({
+    'title': 'Waiting for music...',
+    'artist': 'Connect your player ♫',
+    'status': 'Not connected',
+    'is_playing': False,
+    'album_art': None
+})
+_ERROR_INFO = MappingProxyType({
+    'title': 'Error',
+    'artist': 'Connection lost',
+    'status': 'Error',
+    'is_playing': False,
+    'album_art': None
+})
+_UNKNOWN_INFO = MappingProxyType({
+    'title': 'Unknown',
+    'artist': 'Unknown',
+    'status': 'Unknown',
+    'is_playing': False,
+    'album_art': None
+})
+_OFFLINE_INFO = MappingProxyType({
+    'title': 'Media API не доступен',
+    'artist': 'Установите необходимые зависимости',
+    'status': 'Offline',
+    'is_playing': False,
+    'album_art': None
+})
+
+class MediaController(QObject):
     """Универсальный контроллер медиа для Linux и Windows"""
     
+    # Новые данные о треке от контроллеров, которые сообщают об изменениях
+    # сами; испускается из их потока и доставляется в поток GUI
+    track_changed = Signal(object)
+    
     def __init__(self):
+        super().__init__()
         self.is_playing = False
         self.current_track = {}
         self.volume = 0.5
@@ -89,54 +170,105 @@ class MediaController:
             self.controller = WindowsCOMController()
         else:
             self.controller = DummyController()
+        
+        # Контроллеры с атрибутом on_change присылают изменения сами,
+        # остальные приходится опрашивать по таймеру
+        self.pushes_updates = hasattr(self.controller, 'on_change')
+        if self.pushes_updates:
+            self.controller.on_change = self.track_changed.emit
+        
+        # Методы бэкенда привязываются к экземпляру напрямую, чтобы
+        # вызовы из GUI не проходили через лишний метод-обёртку
+        controller = self.controller
+        self.get_track_info = controller.get_track_info
+        self.play_pause = controller.play_pause
+        self.next_track = controller.next_track
+        self.previous_track = controller.previous_track
+        self.set_volume = controller.set_volume
+        self.get_volume = controller.get_volume
+        if hasattr(controller, 'refresh'):
+            self.refresh = controller.refresh
     
-    def get_track_info(self):
-        return self.controller.get_track_info()
-    
-    def play_pause(self):
-        self.controller.play_pause()
-    
-    def next_track(self):
-        self.controller.next_track()
-    
-    def previous_track(self):
-        self.controller.previous_track()
-    
-    def set_volume(self, volume):
-        self.controller.set_volume(volume)
-    
-    def get_volume(self):
-        return self.controller.get_volume()
+    def refresh(self):
+        """Принудительная сверка состояния (если бэкенд её не умеет - ничего)"""
 
 class LinuxMPRISController:
     """Контроллер для Linux через MPRIS"""
     
+    BUS_NAME = "org.mpris.MediaPlayer2.spotify"
+    OBJECT_PATH = "/org/mpris/MediaPlayer2"
+    PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+    
     def __init__(self):
         self.mpris = None
+        self.on_change = None
+        self._info = self._read_track_info()
+        
+        # DBus-прокси живёт в отдельном потоке со своим GLib-контекстом:
+        # сигналы PropertiesChanged обрабатываются там и не трогают GUI
+        self._context = GLib.MainContext()
+        ready = threading.Event()
+        threading.Thread(target=self._run_dbus_loop, args=(ready,), daemon=True).start()
+        ready.wait()
+    
+    def _run_dbus_loop(self, ready):
+        self._context.push_thread_default()
         self.connect_to_spotify()
+        ready.set()
+        GLib.MainLoop(self._context).run()
     
     def connect_to_spotify(self):
         try:
-            bus = pydbus.SessionBus()
-            self.mpris = bus.get("org.mpris.MediaPlayer2.spotify", "/org/mpris/MediaPlayer2")
-            print("✅ Подключён к Spotify через MPRIS")
+            # Прокси кэширует свойства плеера и сам обновляет кэш по
+            # сигналу PropertiesChanged, поэтому опрашивать DBus не нужно
+            self.mpris = Gio.DBusProxy.new_for_bus_sync(
+                Gio.BusType.SESSION,
+                Gio.DBusProxyFlags.DO_NOT_AUTO_START | Gio.DBusProxyFlags.GET_INVALIDATED_PROPERTIES,
+                None,
+                self.BUS_NAME,
+                self.OBJECT_PATH,
+                self.PLAYER_INTERFACE,
+                None
+            )
+            self.mpris.connect('g-properties-changed', self._on_props_changed)
+            self.mpris.connect('notify::g-name-owner', self._on_name_owner_changed)
+            self._info = self._read_track_info()
+            
+            if self.mpris.get_name_owner():
+                print("✅ Подключён к Spotify через MPRIS")
+            else:
+                print("⏳ Spotify не запущен, ожидаю подключения через MPRIS")
         except Exception as e:
-            print(f"❌ Не удалось подключиться к Spotify: {e}")
+            log.error("❌ Не удалось подключиться к Spotify: %s", e)
             self.mpris = None
     
-    def get_track_info(self):
-        if not self.mpris:
-            return {
-                'title': 'Waiting for music...',
-                'artist': 'Connect your player ♫',
-                'status': 'Not connected',
-                'is_playing': False,
-                'album_art': None
-            }
+    def _on_props_changed(self, proxy, changed, invalidated):
+        changed = changed.unpack()
+        if 'Metadata' in changed or 'PlaybackStatus' in changed or invalidated:
+            self._update_info()
+    
+    def _on_name_owner_changed(self, proxy, pspec):
+        self._update_info()
+    
+    def _update_info(self):
+        # Сигналы и сверка часто приносят те же самые данные (например,
+        # меняется только Volume) - такие обновления в GUI не отправляются
+        info = self._read_track_info()
+        if info == self._info:
+            return
+        self._info = info
+        if self.on_change:
+            self.on_change(info)
+    
+    def _read_track_info(self):
+        if not self.mpris or not self.mpris.get_name_owner():
+            return _WAITING_INFO
         
         try:
-            metadata = self.mpris.Metadata
-            playback_status = self.mpris.PlaybackStatus
+            metadata = self.mpris.get_cached_property('Metadata')
+            metadata = metadata.unpack() if metadata else {}
+            playback_status = self.mpris.get_cached_property('PlaybackStatus')
+            playback_status = playback_status.unpack() if playback_status else None
             
             return {
                 'title': metadata.get('xesam:title', 'Unknown'),
@@ -146,49 +278,76 @@ class LinuxMPRISController:
                 'album_art': metadata.get('mpris:artUrl', None)
             }
         except Exception as e:
-            print(f"Ошибка получения данных MPRIS: {e}")
-            return {
-                'title': 'Error',
-                'artist': 'Connection lost',
-                'status': 'Error',
-                'is_playing': False,
-                'album_art': None
-            }
+            log.warning("Ошибка получения данных MPRIS: %s", e)
+            return _ERROR_INFO
+    
+    def get_track_info(self):
+        # Только чтение кэша, обновляемого сигналами DBus
+        return self._info
+    
+    def _call_async(self, method, parameters, action, callback=None):
+        """Асинхронный вызов метода плеера из потока DBus"""
+        def start_call():
+            self.mpris.call(method, parameters, Gio.DBusCallFlags.NONE, -1, None,
+                            callback or self._on_call_finished, action)
+            return GLib.SOURCE_REMOVE
+        self._context.invoke_full(GLib.PRIORITY_DEFAULT, start_call)
     
+    def _on_call_finished(self, proxy, result, action):
+        try:
+            proxy.call_finish(result)
+        except Exception as e:
+            log.warning("Ошибка %s: %s", action, e)
+    
+    def refresh(self):
+        """Сверка кэша прокси с плеером на случай потерянных сигналов"""
+        if self.mpris and self.mpris.get_name_owner():
+            self._call_async(
+                'org.freedesktop.DBus.Properties.GetAll',
+                GLib.Variant('(s)', (self.PLAYER_INTERFACE,)),
+                'обновления свойств',
+                self._on_refresh_finished
+            )
+    
+    def _on_refresh_finished(self, proxy, result, action):
+        try:
+            properties = proxy.call_finish(result).get_child_value(0)
+        except Exception as e:
+            log.warning("Ошибка %s: %s", action, e)
+            return
+        for i in range(properties.n_children()):
+            entry = properties.get_child_value(i)
+            proxy.set_cached_property(entry.get_child_value(0).get_string(),
+                                      entry.get_child_value(1).get_variant())
+        self._update_info()
+    
+    # Команды не ждут ответа плеера: новое состояние придёт сигналом
+    # PropertiesChanged сразу, как только DBus его доставит
     def play_pause(self):
         if self.mpris:
-            try:
-                self.mpris.PlayPause()
-            except Exception as e:
-                print(f"Ошибка play/pause: {e}")
+            self._call_async('PlayPause', None, 'play/pause')
     
     def next_track(self):
         if self.mpris:
-            try:
-                self.mpris.Next()
-            except Exception as e:
-                print(f"Ошибка next: {e}")
+            self._call_async('Next', None, 'next')
     
     def previous_track(self):
         if self.mpris:
-            try:
-                self.mpris.Previous()
-            except Exception as e:
-                print(f"Ошибка previous: {e}")
+            self._call_async('Previous', None, 'previous')
     
     def set_volume(self, volume):
         if self.mpris:
-            try:
-                self.mpris.Volume = volume
-            except Exception as e:
-                print(f"Ошибка установки громкости: {e}")
+            self._call_async(
+                'org.freedesktop.DBus.Properties.Set',
+                GLib.Variant('(ssv)', (self.PLAYER_INTERFACE, 'Volume', GLib.Variant('d', volume))),
+                'установки громкости'
+            )
     
     def get_volume(self):
         if self.mpris:
-            try:
-                return self.mpris.Volume
-            except Exception:
-                return 0.5
+            volume = self.mpris.get_cached_property('Volume')
+            if volume is not None:
+                return volume.unpack()
         return 0.5
 
 class WindowsMediaController:
@@ -197,86 +356,132 @@ class WindowsMediaController:
     def __init__(self):
         self.session_manager = None
         self.current_session = None
-        self.setup_windows_media()
+        self.on_change = None
+        self._session_tokens = None
+        self._spotify_app_ids = {}
+        self._info = _WAITING_INFO
+        
+        # Асинхронные операции WinRT выполняются в отдельном потоке со своим
+        # event loop, GUI получает результаты через on_change
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self.setup_windows_media(), self.loop)
     
-    def setup_windows_media(self):
+    async def setup_windows_media(self):
         try:
-            # Создание event loop для async операций
-            if not hasattr(self, 'loop'):
-                self.loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self.loop)
-            
             # Получение менеджера сессий
-            self.session_manager = wmc_winrt.GlobalSystemMediaTransportControlsSessionManager.request_async().get()
+            self.session_manager = await wmc_winrt.GlobalSystemMediaTransportControlsSessionManager.request_async()
+            # Появление и закрытие сессий тоже приходит событием, так что
+            # список сессий перебирается только при его изменении
+            self.session_manager.add_sessions_changed(self._on_sessions_changed)
             self.find_spotify_session()
             print("✅ Подключён к Windows Media API")
         except Exception as e:
-            print(f"❌ Ошибка инициализации Windows Media: {e}")
+            log.error("❌ Ошибка инициализации Windows Media: %s", e)
+        await self._fetch_track_info()
     
     def find_spotify_session(self):
         try:
             sessions = self.session_manager.get_sessions()
             for session in sessions:
-                if "spotify" in session.source_app_user_model_id.lower():
-                    self.current_session = session
+                if self._is_spotify_app(session.source_app_user_model_id):
+                    self._watch_session(session)
                     return
+            self._watch_session(None)
         except Exception as e:
-            print(f"Ошибка поиска Spotify сессии: {e}")
+            log.warning("Ошибка поиска Spotify сессии: %s", e)
     
-    def get_track_info(self):
-        if not self.current_session:
-            self.find_spotify_session()
+    def _is_spotify_app(self, app_id):
+        is_spotify = self._spotify_app_ids.get(app_id)
+        if is_spotify is None:
+            is_spotify = self._spotify_app_ids[app_id] = "spotify" in app_id.lower()
+        return is_spotify
+    
+    def _watch_session(self, session):
+        if session == self.current_session:
+            return
+        if self._session_tokens:
+            old_session = self.current_session
+            media_token, playback_token = self._session_tokens
+            old_session.remove_media_properties_changed(media_token)
+            old_session.remove_playback_info_changed(playback_token)
+            self._session_tokens = None
         
+        # Сессия сама сообщает о смене трека и состояния, опрашивать
+        # её по таймеру не нужно
+        self.current_session = session
+        if session:
+            self._session_tokens = (
+                session.add_media_properties_changed(self._on_session_changed),
+                session.add_playback_info_changed(self._on_session_changed),
+            )
+    
+    def _on_sessions_changed(self, manager, args):
+        asyncio.run_coroutine_threadsafe(self._update_sessions(), self.loop)
+    
+    async def _update_sessions(self):
+        self.find_spotify_session()
+        await self._fetch_track_info()
+    
+    def _on_session_changed(self, session, args):
+        # События WinRT приходят в его собственных потоках
+        self.refresh()
+    
+    def refresh(self):
+        """Запрос свежих данных сессии (можно вызывать из любого потока)"""
+        asyncio.run_coroutine_threadsafe(self._fetch_track_info(), self.loop)
+    
+    def get_track_info(self):
+        # Последний известный результат, без ожидания WinRT
+        return self._info
+    
+    def _publish(self, info):
+        if info == self._info:
+            return
+        self._info = info
+        if self.on_change:
+            self.on_change(info)
+    
+    async def _fetch_track_info(self):
         if not self.current_session:
-            return {
-                'title': 'Waiting for music...',
-                'artist': 'Connect your player ♫',
-                'status': 'Not connected',
-                'is_playing': False,
-                'album_art': None
-            }
+            self._publish(_WAITING_INFO)
+            return
         
         try:
-            media_info = self.current_session.try_get_media_properties_async().get()
+            media_info = await self.current_session.try_get_media_properties_async()
             playback_info = self.current_session.get_playback_info()
             
-            return {
+            self._publish({
                 'title': media_info.title or 'Unknown',
                 'artist': media_info.artist or 'Unknown',
                 'status': 'Playing' if playback_info.playback_status == 4 else 'Paused',
                 'is_playing': playback_info.playback_status == 4,
                 'album_art': None  # Требует дополнительной обработки
-            }
+            })
         except Exception as e:
-            print(f"Ошибка получения данных Windows Media: {e}")
-            return {
-                'title': 'Error',
-                'artist': 'Connection lost',
-                'status': 'Error',
-                'is_playing': False,
-                'album_art': None
-            }
+            log.warning("Ошибка получения данных Windows Media: %s", e)
+            self._publish(_ERROR_INFO)
     
-    def play_pause(self):
-        if self.current_session:
+    def _send_command(self, command, action):
+        """Команда сессии в потоке event loop, без ожидания в GUI"""
+        async def run():
+            session = self.current_session
+            if not session:
+                return
             try:
-                self.current_session.try_play_pause_async()
+                await getattr(session, command)()
             except Exception as e:
-                print(f"Ошибка play/pause: {e}")
+                log.warning("Ошибка %s: %s", action, e)
+        asyncio.run_coroutine_threadsafe(run(), self.loop)
+    
+    def play_pause(self):
+        self._send_command('try_play_pause_async', 'play/pause')
     
     def next_track(self):
-        if self.current_session:
-            try:
-                self.current_session.try_skip_next_async()
-            except Exception as e:
-                print(f"Ошибка next: {e}")
+        self._send_command('try_skip_next_async', 'next')
     
     def previous_track(self):
-        if self.current_session:
-            try:
-                self.current_session.try_skip_previous_async()
-            except Exception as e:
-                print(f"Ошибка previous: {e}")
+        self._send_command('try_skip_previous_async', 'previous')
     
     def set_volume(self, volume):
         # Windows Media API не поддерживает установку громкости
@@ -288,64 +493,181 @@ class WindowsMediaController:
 class WindowsCOMController:
     """Альтернативный контроллер для Windows через COM"""
     
+    # VK коды для медиа-клавиш
+    MEDIA_KEYS = {
+        'play_pause': 0xB3,      # VK_MEDIA_PLAY_PAUSE
+        'next_track': 0xB0,      # VK_MEDIA_NEXT_TRACK
+        'previous_track': 0xB1   # VK_MEDIA_PREV_TRACK
+    }
+    
     def __init__(self):
         self.spotify_process = None
+        self._pid_checked_at = None
+        self._spotify_hwnd = None
+        self.on_change = None
+        
+        # Смена заголовка окна (а значит и трека) приходит событием
+        # WinEvent в очередь сообщений потока GUI; ссылка на callback
+        # хранится, чтобы ctypes не освободил его раньше хука
+        self._hook = None
+        self._hook_pid = None
+        self._win_event_proc = WINEVENTPROC(self._on_name_change)
+        
+        # Нажатие и отпускание каждой клавиши собираются один раз в
+        # непрерывный массив INPUT[2] и отправляются одним SendInput
+        self._key_inputs = {
+            key: (INPUT * 2)(self._make_key_input(vk, 0), self._make_key_input(vk, KEYEVENTF_KEYUP))
+            for key, vk in self.MEDIA_KEYS.items()
+        }
         self.find_spotify_process()
+        self._info = self._read_track_info()
+    
+    @staticmethod
+    def _make_key_input(vk_code, flags):
+        key_input = INPUT(type=INPUT_KEYBOARD)
+        key_input.ki = KEYBDINPUT(wVk=vk_code, dwFlags=flags)
+        return key_input
     
     def find_spotify_process(self):
+        """Запущен ли Spotify (ответ кэшируется на 4 секунды)
+        
+        Срок заметно короче 5-секундной сверки: таймер может сработать
+        чуть раньше, и каждая вторая сверка не должна получать старый ответ.
+        """
+        now = time.monotonic()
+        if self._pid_checked_at is not None and now - self._pid_checked_at < 4:
+            return self.spotify_process is not None
+        self._pid_checked_at = now
+        
+        # Пока прежний процесс жив, перебирать все процессы не нужно
+        if self.spotify_process and self._image_name(self.spotify_process) == 'spotify.exe':
+            return True
+        
+        self.spotify_process = None
         try:
-            # Поиск процесса Spotify
-            result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq Spotify.exe'], 
-                                  capture_output=True, text=True)
-            if 'Spotify.exe' in result.stdout:
-                print("✅ Найден процесс Spotify")
-                return True
+            # Поиск процесса Spotify без запуска tasklist
+            pids = (wintypes.DWORD * 4096)()
+            needed = wintypes.DWORD()
+            if kernel32.K32EnumProcesses(pids, ctypes.sizeof(pids), ctypes.byref(needed)):
+                for pid in pids[:needed.value // ctypes.sizeof(wintypes.DWORD)]:
+                    if pid and self._image_name(pid) == 'spotify.exe':
+                        self.spotify_process = pid
+                        print("✅ Найден процесс Spotify")
+                        break
         except Exception as e:
-            print(f"Ошибка поиска Spotify: {e}")
-        return False
+            log.warning("Ошибка поиска Spotify: %s", e)
+        return self.spotify_process is not None
+    
+    def _image_name(self, pid):
+        """Имя исполняемого файла процесса"""
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ''
+        try:
+            buffer = ctypes.create_unicode_buffer(260)
+            size = wintypes.DWORD(len(buffer))
+            if kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+                return os.path.basename(buffer.value).lower()
+        finally:
+            kernel32.CloseHandle(handle)
+        return ''
+    
+    def _process_name(self, hwnd):
+        """Имя исполняемого файла процесса, которому принадлежит окно"""
+        pid = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        return self._image_name(pid.value)
+    
+    def _find_spotify_window(self):
+        """Поиск главного окна Spotify среди окон верхнего уровня"""
+        class_name = ctypes.create_unicode_buffer(64)
+        found = []
+        
+        def check_window(hwnd, lparam):
+            # Сначала дешёвые проверки класса и заголовка, и только
+            # потом открытие процесса владельца окна
+            user32.GetClassNameW(hwnd, class_name, len(class_name))
+            if (class_name.value.startswith('Chrome_WidgetWin')
+                    and user32.GetWindowTextLengthW(hwnd) > 0
+                    and self._process_name(hwnd) == 'spotify.exe'):
+                found.append(hwnd)
+                return False
+            return True
+        
+        user32.EnumWindows(WNDENUMPROC(check_window), 0)
+        return found[0] if found else None
+    
+    def _hook_window(self, hwnd):
+        """Подписка на смену заголовков окон процесса Spotify"""
+        pid = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        if pid.value == self._hook_pid:
+            return
+        if self._hook:
+            user32.UnhookWinEvent(self._hook)
+        self._hook = user32.SetWinEventHook(
+            EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE, None,
+            self._win_event_proc, pid.value, 0, WINEVENT_OUTOFCONTEXT
+        )
+        self._hook_pid = pid.value
+    
+    def _on_name_change(self, hook, event, hwnd, id_object, id_child, thread_id, event_time):
+        if hwnd == self._spotify_hwnd and id_object == OBJID_WINDOW:
+            self._update_info()
+    
+    def _window_title(self):
+        if not self._spotify_hwnd:
+            return ''
+        buffer = ctypes.create_unicode_buffer(512)
+        user32.GetWindowTextW(self._spotify_hwnd, buffer, len(buffer))
+        return buffer.value
     
     def get_track_info(self):
-        if not self.find_spotify_process():
+        # Только чтение кэша, обновляемого событиями окна
+        return self._info
+    
+    def refresh(self):
+        """Перечитать заголовок (запуск и закрытие Spotify событий не дают)"""
+        self._update_info()
+    
+    def _update_info(self):
+        info = self._read_track_info()
+        if info == self._info:
+            return
+        self._info = info
+        if self.on_change:
+            self.on_change(info)
+    
+    def _read_track_info(self):
+        # Заголовок окна читается напрямую; окно ищется заново, только
+        # если прежнее пропало (Spotify закрыт или перезапущен)
+        try:
+            title = self._window_title()
+            if not title:
+                # Окна перебираются, только если процесс Spotify запущен
+                self._spotify_hwnd = self._find_spotify_window() if self.find_spotify_process() else None
+                if self._spotify_hwnd:
+                    self._hook_window(self._spotify_hwnd)
+                title = self._window_title()
+        except Exception as e:
+            log.warning("Ошибка получения данных COM: %s", e)
+            title = ''
+        
+        if not title:
+            return _WAITING_INFO
+        
+        # Во время воспроизведения заголовок окна - "Исполнитель - Трек"
+        artist_part, separator, title_part = title.partition(' - ')
+        if separator:
             return {
-                'title': 'Waiting for music...',
-                'artist': 'Connect your player ♫',
-                'status': 'Not connected',
-                'is_playing': False,
+                'title': title_part.strip(),
+                'artist': artist_part.strip(),
+                'status': 'Playing',
+                'is_playing': True,
                 'album_art': None
             }
         
-        # Упрощённая версия - получение информации через заголовок окна
-        try:
-            result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq Spotify.exe', '/V'], 
-                                  capture_output=True, text=True)
-            
-            # Парсинг заголовка окна Spotify
-            lines = result.stdout.split('\n')
-            for line in lines:
-                if 'Spotify.exe' in line and ' - ' in line:
-                    # Извлечение информации о треке из заголовка
-                    parts = line.split(' - ')
-                    if len(parts) >= 2:
-                        title_part = parts[-1].strip()
-                        artist_part = parts[-2].strip()
-                        
-                        return {
-                            'title': title_part,
-                            'artist': artist_part,
-                            'status': 'Playing',
-                            'is_playing': True,
-                            'album_art': None
-                        }
-        except Exception as e:
-            print(f"Ошибка получения данных COM: {e}")
-        
-        return {
-            'title': 'Unknown',
-            'artist': 'Unknown',
-            'status': 'Unknown',
-            'is_playing': False,
-            'album_art': None
-        }
+        return _UNKNOWN_INFO
     
     def play_pause(self):
         self.send_media_key('play_pause')
@@ -357,31 +679,14 @@ class WindowsCOMController:
         self.send_media_key('previous_track')
     
     def send_media_key(self, key):
+        key_inputs = self._key_inputs.get(key)
+        if key_inputs is None:
+            return
         try:
-            if IS_WINDOWS:
-                # Отправка медиа-клавиш через VK коды
-                import ctypes
-                from ctypes import wintypes
-                
-                user32 = ctypes.windll.user32
-                
-                # VK коды для медиа-клавиш
-                VK_MEDIA_PLAY_PAUSE = 0xB3
-                VK_MEDIA_NEXT_TRACK = 0xB0
-                VK_MEDIA_PREV_TRACK = 0xB1
-                
-                key_map = {
-                    'play_pause': VK_MEDIA_PLAY_PAUSE,
-                    'next_track': VK_MEDIA_NEXT_TRACK,
-                    'previous_track': VK_MEDIA_PREV_TRACK
-                }
-                
-                if key in key_map:
-                    vk_code = key_map[key]
-                    user32.keybd_event(vk_code, 0, 0, 0)
-                    user32.keybd_event(vk_code, 0, 2, 0)
+            # Отправка медиа-клавиши через SendInput (вместо устаревшего keybd_event)
+            user32.SendInput(len(key_inputs), key_inputs, ctypes.sizeof(INPUT))
         except Exception as e:
-            print(f"Ошибка отправки медиа-клавиши: {e}")
+            log.warning("Ошибка отправки медиа-клавиши: %s", e)
     
     def set_volume(self, volume):
         # COM контроллер не поддерживает установку громкости
@@ -394,13 +699,7 @@ class DummyController:
     """Заглушка для случаев, когда нет доступных контроллеров"""
     
     def get_track_info(self):
-        return {
-            'title': 'Media API не доступен',
-            'artist': 'Установите необходимые зависимости',
-            'status': 'Offline',
-            'is_playing': False,
-            'album_art': None
-        }
+        return _OFFLINE_INFO
     
     def play_pause(self):
         print("⚠️  Управление недоступно")
@@ -417,6 +716,314 @@ class DummyController:
     def get_volume(self):
         return 0.5
 
+def _equalizer_step_numpy(h, s, d, rand, playing, steps):
+    """Шаг анимации эквалайзера векторными операциями NumPy"""
+    if playing:
+        h += s * d * steps
+        
+        # Отскок от границ
+        d[h >= 1.0] = -1
+        d[h <= 0.1] = 1
+        np.clip(h, 0.1, 1.0, out=h)
+        
+        # Случайное изменение направления
+        d[rand < 0.05 * steps] *= -1
+    else:
+        # Плавное затухание при остановке
+        h *= 0.95 ** steps
+        np.maximum(h, 0.1, out=h)
+
+def _equalizer_step_loop(h, s, d, rand, playing, steps):
+    """Шаг анимации эквалайзера поэлементным циклом (для Numba)"""
+    if playing:
+        for i in range(h.shape[0]):
+            h[i] += s[i] * d[i] * steps
+            
+            # Отскок от границ
+            if h[i] >= 1.0:
+                h[i] = 1.0
+                d[i] = -1
+            elif h[i] <= 0.1:
+                h[i] = 0.1
+                d[i] = 1
+            
+            # Случайное изменение направления
+            if rand[i] < 0.05 * steps:
+                d[i] = -d[i]
+    else:
+        # Плавное затухание при остановке
+        decay = 0.95 ** steps
+        for i in range(h.shape[0]):
+            h[i] = max(h[i] * decay, 0.1)
+
+# Шаг анимации эквалайзера; если установлена Numba, после фоновой
+# компиляции подменяется машинной версией цикла
+equalizer_step = _equalizer_step_numpy
+
+def _compile_equalizer_step():
+    """Импорт Numba и компиляция шага эквалайзера"""
+    global equalizer_step
+    try:
+        from numba import njit
+    except ImportError:
+        return
+    
+    # На 16 полосках накладные расходы на каждый вызов NumPy больше самой
+    # работы, поэтому цикл компилируется (и кэшируется на диске)
+    try:
+        step = njit(cache=True, fastmath=True)(_equalizer_step_loop)
+        state = np.zeros((3, 16), dtype=np.float32)
+        step(state[0], state[1], state[2], np.zeros(16, dtype=np.float32), True, 1.0)
+    except Exception as e:
+        log.warning("Ошибка компиляции эквалайзера: %s", e)
+        return
+    equalizer_step = step
+
+def warm_up_equalizer_step():
+    """Прогрев JIT в фоне: окно не ждёт ни импорта Numba, ни компиляции"""
+    threading.Thread(target=_compile_equalizer_step, daemon=True).start()
+
+# postEvent в PySide6 принимает приоритет только как int, а Qt.EventPriority
+# там - обычный Enum
+LOW_EVENT_PRIORITY = int(getattr(Qt.LowEventPriority, 'value', Qt.LowEventPriority))
+
+class AlbumArtEvent(QEvent):
+    """Результат фоновой задачи (пустой QImage при ошибке, None - файл
+    кэша оказался битым и обложку нужно загрузить заново)"""
+    
+    TYPE = QEvent.Type(QEvent.registerEventType())
+    
+    def __init__(self, url, image):
+        super().__init__(self.TYPE)
+        self.url = url
+        self.image = image
+
+class AlbumArtTask(QRunnable):
+    """Чтение кэша и декодирование обложки в пуле потоков"""
+    
+    def __init__(self, loader, url, data=None):
+        super().__init__()
+        self.loader = loader
+        self.url = url
+        self.data = data
+    
+    def run(self):
+        try:
+            path = self.loader.cache_path(self.url)
+            if self.data is None:
+                try:
+                    image = self.loader.decode_file(path)
+                except Exception as e:
+                    # Нечитаемый файл (обрезанный или чужой) иначе навсегда
+                    # оставил бы обложку пустой - он удаляется, а обложка
+                    # загружается из сети
+                    log.warning("Битый файл в кэше обложек %s: %s", path.name, e)
+                    path.unlink(missing_ok=True)
+                    image = None
+            else:
+                image = self.loader.decode(self.data)
+                if path is not None:
+                    self.loader.store(path, image)
+        except Exception as e:
+            log.warning("Ошибка загрузки обложки: %s", e)
+            image = QImage()
+        # Обложка доставляется событием с низким приоритетом, чтобы при
+        # быстром переключении треков клики по кнопкам обрабатывались раньше.
+        # Результат должен дойти в любом случае, иначе ссылка навсегда
+        # останется в _pending загрузчика
+        try:
+            QCoreApplication.postEvent(self.loader, AlbumArtEvent(self.url, image), LOW_EVENT_PRIORITY)
+        except Exception as e:
+            log.warning("Ошибка доставки обложки с низким приоритетом: %s", e)
+            QCoreApplication.postEvent(self.loader, AlbumArtEvent(self.url, image))
+
+class AlbumArtCacheCleanupTask(QRunnable):
+    """Удаление файлов прежнего формата кэша (исходные байты в *.bin)"""
+    
+    def __init__(self, cache_dir):
+        super().__init__()
+        self.cache_dir = cache_dir
+    
+    def run(self):
+        try:
+            for path in self.cache_dir.glob('*.bin'):
+                path.unlink(missing_ok=True)
+        except OSError as e:
+            log.warning("Ошибка очистки кэша обложек: %s", e)
+
+class AlbumArtLoader(QObject):
+    """Загрузка обложек с кэшем в памяти (LRU) и на диске"""
+    
+    # Размер обложки Spotify зашит в префикс её идентификатора: 640 и 300
+    # пикселей заменяются на 64, которых хватает виджету в 60 пикселей
+    SPOTIFY_ART_PREFIXES = ('/image/ab67616d0000b273', '/image/ab67616d00001e02')
+    SPOTIFY_SMALL_ART_PREFIX = '/image/ab67616d00004851'
+    
+    # Обложка готова к показу; испускается в потоке GUI
+    ready = Signal(str, QPixmap)
+    
+    def __init__(self, size=60, max_cached=64):
+        super().__init__()
+        self.size = size
+        self.max_cached = max_cached
+        self._pixmaps = OrderedDict()
+        self._pending = set()
+        self._replies = {}
+        self._current_url = None
+        cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+        self.cache_dir = Path(cache_home) / 'spotify-mini-player' / 'art'
+        
+        # Сеть - асинхронно через Qt: ответы приходят сигналами в потоке
+        # GUI, а соединения с CDN (i.scdn.co) держатся открытыми между
+        # обложками, так что TLS-рукопожатие не повторяется
+        self._network = QNetworkAccessManager(self)
+        
+        # Диск и декодирование - в отдельном потоке, чтобы не замирал GUI
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(1)
+        self._pool.start(AlbumArtCacheCleanupTask(self.cache_dir))
+    
+    def cached(self, url):
+        """Готовая обложка из памяти или None"""
+        pixmap = self._pixmaps.get(url)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(url)
+        return pixmap
+    
+    def request(self, url):
+        """Фоновая загрузка обложки, результат придёт сигналом ready"""
+        # Показывается только обложка последнего трека: при быстром
+        # переключении незавершённые загрузки предыдущих прерываются,
+        # даже если новая обложка найдётся в кэше на диске.
+        # Свои прерывания помечаются удалением из _replies до abort(),
+        # чтобы отличать их от тайм-аута, который тоже прерывает ответ
+        self._current_url = url
+        for stale_url in [other for other in self._replies if other != url]:
+            self._replies.pop(stale_url).abort()
+        
+        if url in self._pending:
+            return
+        self._pending.add(url)
+        
+        path = self.cache_path(url)
+        if path is not None and path.exists():
+            self._pool.start(AlbumArtTask(self, url))
+            return
+        self._download(url)
+    
+    def _download(self, url, small=True):
+        request_url = self.download_url(url) if small else url
+        
+        # HTTP/2 позволяет гнать несколько обложек по одному соединению;
+        # тайм-аут - как у прежней загрузки через urllib
+        network_request = QNetworkRequest(QUrl(request_url))
+        network_request.setAttribute(QNetworkRequest.Http2AllowedAttribute, True)
+        network_request.setTransferTimeout(5000)
+        reply = self._network.get(network_request)
+        reply.finished.connect(lambda: self._on_reply_finished(url, reply, request_url != url))
+        self._replies[url] = reply
+    
+    def _on_reply_finished(self, url, reply, rewritten=False):
+        reply.deleteLater()
+        tracked = self._replies.get(url) is reply
+        if tracked:
+            del self._replies[url]
+        if reply.error() != QNetworkReply.NoError:
+            # Молча отбрасываются только загрузки, прерванные в request()
+            if tracked:
+                log.warning("Ошибка загрузки обложки: %s", reply.errorString())
+                if rewritten:
+                    # Уменьшенного варианта может не быть - повтор по
+                    # исходной ссылке от плеера
+                    self._download(url, small=False)
+                    return
+            self._pending.discard(url)
+            return
+        self._pool.start(AlbumArtTask(self, url, reply.readAll()))
+    
+    def event(self, event):
+        if event.type() == AlbumArtEvent.TYPE:
+            if event.image is None:
+                # Битый файл кэша: заново загружается только обложка,
+                # которая сейчас нужна, устаревшая просто снимается с учёта
+                if event.url == self._current_url:
+                    self._download(event.url)
+                else:
+                    self._pending.discard(event.url)
+            else:
+                self._on_image_loaded(event.url, event.image)
+            return True
+        return super().event(event)
+    
+    def _on_image_loaded(self, url, image):
+        self._pending.discard(url)
+        if image.isNull():
+            return
+        
+        # В кэше хранится уже готовый к отрисовке QPixmap: конвертация
+        # из QImage выполняется один раз, а не при каждом показе
+        pixmap = QPixmap.fromImage(image)
+        self._pixmaps[url] = pixmap
+        if len(self._pixmaps) > self.max_cached:
+            self._pixmaps.popitem(last=False)
+        self.ready.emit(url, pixmap)
+    
+    def download_url(self, url):
+        """Ссылка на наименьший подходящий вариант обложки"""
+        if self.size <= 64:
+            for prefix in self.SPOTIFY_ART_PREFIXES:
+                if prefix in url:
+                    return url.replace(prefix, self.SPOTIFY_SMALL_ART_PREFIX, 1)
+        return url
+    
+    def cache_path(self, url):
+        """Файл дискового кэша для ссылки (локальные файлы не кэшируются)"""
+        if not url.startswith(('http://', 'https://')):
+            return None
+        return self.cache_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.png"
+    
+    def store(self, path, image):
+        """Сохранение уже уменьшенной обложки в дисковый кэш
+        
+        На диске лежит PNG размера виджета, поэтому при следующем запуске
+        декодируется несколько килобайт вместо полноразмерного JPEG.
+        Запись идёт во временный файл, чтобы оборванная запись не
+        оставила в кэше битую картинку.
+        """
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix('.tmp')
+            if not image.save(str(temp_path), 'PNG'):
+                raise OSError(f"не удалось сохранить {temp_path}")
+            os.replace(temp_path, path)
+        except OSError as e:
+            log.warning("Ошибка записи кэша обложек: %s", e)
+    
+    def decode(self, data):
+        """Декодирование загруженных байтов (QByteArray ответа, без копии)"""
+        buffer = QBuffer(data)
+        return self.read_scaled(QImageReader(buffer))
+    
+    def decode_file(self, path):
+        """Декодирование файла из кэша: читает сам декодер, без bytes в Python"""
+        return self.read_scaled(QImageReader(str(path)))
+    
+    def read_scaled(self, reader):
+        """Чтение картинки сразу в размер виджета"""
+        # Декодер сам уменьшает картинку при чтении (для JPEG - прямо
+        # в libjpeg), полноразмерная копия и отдельный scaled() не нужны
+        size = reader.size()
+        if size.isValid():
+            reader.setScaledSize(size.scaled(self.size, self.size, Qt.KeepAspectRatio))
+        # Качество ниже 50 включает у JPEG быстрый целочисленный DCT и
+        # быстрое (без сглаживания) доуменьшение - на 60 пикселях разницы
+        # не видно
+        reader.setQuality(25)
+        image = reader.read()
+        if image.isNull():
+            raise ValueError(reader.errorString())
+        return image
+
 class EqualizerWidget(QWidget):
     """Анимированный эквалайзер в японском стиле"""
     
@@ -424,11 +1031,21 @@ class EqualizerWidget(QWidget):
         super().__init__()
         self.setFixedSize(200, 60)
         
-        # Параметры эквалайзера
+        # Параметры эквалайзера: высоты, скорости и направления полосок
+        # хранятся в одном массиве (SoA), чтобы кадр считался векторно
         self.bars = 16
-        self.bar_heights = [0.1 + random.random() * 0.9 for _ in range(self.bars)]
-        self.bar_speeds = [0.02 + random.random() * 0.06 for _ in range(self.bars)]
-        self.bar_directions = [1 if random.random() > 0.5 else -1 for _ in range(self.bars)]
+        self._rng = np.random.default_rng()
+        self.state = np.empty((3, self.bars), dtype=np.float32)
+        self.bar_heights, self.bar_speeds, self.bar_directions = self.state
+        self.bar_heights[:] = 0.1 + self._rng.random(self.bars) * 0.9
+        self.bar_speeds[:] = 0.02 + self._rng.random(self.bars) * 0.06
+        self.bar_directions[:] = np.where(self._rng.random(self.bars) > 0.5, 1, -1)
+        self._painted_heights = self.bar_heights.copy()
+        
+        # Случайные числа для смены направления берутся срезами из
+        # заранее заполненного пула, который обновляется целиком
+        self._rng_pool = self._rng.random(4096, dtype=np.float32)
+        self._rng_idx = 0
         
         # Цвета градиента (деревяно-розовая гамма)
         self.colors = [
@@ -438,8 +1055,29 @@ class EqualizerWidget(QWidget):
             QColor(255, 204, 179),   # Светло-персиковый
         ]
         
+        # Градиенты полосок заданы в координатах самой полоски (ObjectMode),
+        # поэтому на каждый цвет хватает одной кисти на все кадры
+        self._bar_brushes = []
+        for color in self.colors:
+            bar_gradient = QLinearGradient(0, 1, 0, 0)
+            bar_gradient.setCoordinateMode(QGradient.ObjectMode)
+            bar_gradient.setColorAt(0, color.darker(140))
+            bar_gradient.setColorAt(0.5, color)
+            bar_gradient.setColorAt(1, color.lighter(120))
+            self._bar_brushes.append(QBrush(bar_gradient))
+        
+        # Таблица "высота в 1/256 -> индекс цвета" вместо min(int(...))
+        # на каждую полоску; 257-й элемент - для высоты ровно 1.0
+        self._color_lut = np.minimum(np.arange(257) * len(self.colors) // 256, len(self.colors) - 1)
+        self._bg_pixmap = None
+        self._bar_x = []
+        self._bar_width = 0.0
+        self._bar_sprites = {}
+        
         # Запуск анимации
         self.is_playing = False
+        self._frame_clock = QElapsedTimer()
+        self._frame_clock.start()
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_equalizer)
         self.timer.start(50)
@@ -447,67 +1085,244 @@ class EqualizerWidget(QWidget):
     def set_playing(self, playing):
         """Установить состояние воспроизведения"""
         self.is_playing = playing
+        if playing and not self.timer.isActive():
+            self._frame_clock.restart()
+            self.timer.start(50)
     
     def update_equalizer(self):
         """Обновление анимации эквалайзера"""
-        if self.is_playing:
-            for i in range(self.bars):
-                self.bar_heights[i] += self.bar_speeds[i] * self.bar_directions[i]
-                
-                # Отскок от границ
-                if self.bar_heights[i] >= 1.0:
-                    self.bar_heights[i] = 1.0
-                    self.bar_directions[i] = -1
-                elif self.bar_heights[i] <= 0.1:
-                    self.bar_heights[i] = 0.1
-                    self.bar_directions[i] = 1
-                
-                # Случайное изменение направления
-                if random.random() < 0.05:
-                    self.bar_directions[i] *= -1
-        else:
-            # Плавное затухание при остановке
-            for i in range(self.bars):
-                self.bar_heights[i] *= 0.95
-                if self.bar_heights[i] < 0.1:
-                    self.bar_heights[i] = 0.1
+        h, s, d = self.state
+        
+        # Прошедшее время в шагах по 50 мс: скорость анимации не зависит
+        # от того, насколько ровно срабатывает таймер
+        steps = min(self._frame_clock.restart() / 50.0, 4.0)
+        
+        if self._rng_idx + self.bars > len(self._rng_pool):
+            self._rng.random(dtype=np.float32, out=self._rng_pool)
+            self._rng_idx = 0
+        rand = self._rng_pool[self._rng_idx:self._rng_idx + self.bars]
+        self._rng_idx += self.bars
+        
+        equalizer_step(h, s, d, rand, self.is_playing, steps)
+        
+        if not self.is_playing:
+            if np.all(h <= 0.1):
+                # Полоски опустились - таймер стоит до возобновления
+                # воспроизведения, остаётся отрисовать последний кадр
+                self.timer.stop()
+            elif np.abs(h - self._painted_heights).max() < 1 / 256:
+                # Изменение меньше пикселя не стоит перерисовки
+                return
         
+        self._painted_heights[:] = h
         self.update()
     
-    def paintEvent(self, event):
-        """Отрисовка эквалайзера"""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+    def resizeEvent(self, event):
+        """Сброс кэшированной геометрии под новый размер"""
+        super().resizeEvent(event)
+        self._bg_pixmap = None
+        self._bar_sprites.clear()
+        
+        # Положение и ширина полосок постоянны для размера виджета,
+        # каждый кадр меняется только высота
+        step = self.width() / self.bars
+        self._bar_x = [i * step + 2 for i in range(self.bars)]
+        self._bar_width = step - 4
+    
+    def render_background(self):
+        """Однократная отрисовка статичного фона в pixmap"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
         
-        # Фон с градиентом
         gradient = QLinearGradient(0, 0, 0, self.height())
         gradient.setColorAt(0, QColor(51, 25, 12, 204))  # rgba(51, 25, 12, 0.8)
         gradient.setColorAt(1, QColor(25, 12, 5, 229))   # rgba(25, 12, 5, 0.9)
+        painter = QPainter(pixmap)
         painter.fillRect(self.rect(), gradient)
+        painter.end()
+        return pixmap
+    
+    def bar_sprite(self, color_index, height):
+        """Готовая полоска заданного цвета и высоты в пикселях
         
-        # Рисование полосок эквалайзера
-        bar_width = self.width() / self.bars
-        
-        for i in range(self.bars):
-            x = i * bar_width
-            bar_height = self.bar_heights[i] * (self.height() - 10)
-            y = self.height() - bar_height - 5
-            
-            # Выбор цвета в зависимости от высоты
-            color_index = min(int(self.bar_heights[i] * len(self.colors)), len(self.colors) - 1)
-            color = self.colors[color_index]
-            
-            # Градиент для каждой полоски
-            bar_gradient = QLinearGradient(x, y + bar_height, x, y)
-            bar_gradient.setColorAt(0, color.darker(140))
-            bar_gradient.setColorAt(0.5, color)
-            bar_gradient.setColorAt(1, color.lighter(120))
+        Сглаживание закруглённых краёв и градиент растеризуются один раз
+        на пару (цвет, высота), дальше полоска только копируется.
+        """
+        key = (color_index, height)
+        sprite = self._bar_sprites.get(key)
+        if sprite is None:
+            ratio = self.devicePixelRatioF()
+            size = QSizeF(self._bar_width, height)
+            sprite = QPixmap((size * ratio).toSize())
+            sprite.setDevicePixelRatio(ratio)
+            sprite.fill(Qt.transparent)
             
-            # Рисование полоски с закруглёнными краями
-            rect = QRectF(x + 2, y, bar_width - 4, bar_height)
-            painter.setBrush(bar_gradient)
+            painter = QPainter(sprite)
+            painter.setRenderHint(QPainter.Antialiasing)
             painter.setPen(Qt.NoPen)
-            painter.drawRoundedRect(rect, 3, 3)
+            painter.setBrush(self._bar_brushes[color_index])
+            painter.drawRoundedRect(QRectF(QPointF(0, 0), size), 3, 3)
+            painter.end()
+            self._bar_sprites[key] = sprite
+        return sprite
+    
+    def paintEvent(self, event):
+        """Отрисовка эквалайзера"""
+        # Фон не меняется между кадрами - вместо градиента каждый раз
+        # копируется готовый pixmap (пересоздаётся при смене размера/DPI)
+        if self._bg_pixmap is None or self._bg_pixmap.devicePixelRatio() != self.devicePixelRatioF():
+            self._bg_pixmap = self.render_background()
+            self._bar_sprites.clear()
+        
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._bg_pixmap)
+        
+        # Высоты всех полосок за кадр считаются разом и округляются до
+        # целых пикселей, чтобы готовые полоски переиспользовались
+        heights = self.state[0]
+        bottom = self.height() - 5
+        pixel_heights = np.rint(heights * (self.height() - 10)).astype(np.intp)
+        color_indices = self._color_lut[(heights * 256).astype(np.intp)]
+        
+        # Рисование полосок копированием готовых pixmap, без сглаживания
+        # и градиентов на каждом кадре
+        bar_sprite = self.bar_sprite
+        draw_pixmap = painter.drawPixmap
+        for x, height, color_index in zip(self._bar_x, pixel_heights.tolist(), color_indices.tolist()):
+            if height > 0:
+                draw_pixmap(QPointF(x, bottom - height), bar_sprite(color_index, height))
+
+# Стили мини-плеера (деревяно-розовая гамма)
+STYLE_SHEET = """
+QMainWindow {
+    background: qradialgradient(cx:0.3, cy:0.2, radius:0.7, fx:0.3, fy:0.2, stop:0 #4a2c1a, stop:1 #2d1810);
+    border: 3px solid #8b4513;
+    border-radius: 20px;
+}
+
+#track_title {
+    color: #ffd4a3;
+    font-size: 13px;
+    font-weight: bold;
+    padding: 2px;
+}
+
+#track_artist {
+    color: #d4a574;
+    font-size: 11px;
+    font-style: italic;
+    padding: 2px;
+}
+
+#status_label {
+    color: #ff9999;
+    font-size: 10px;
+    font-weight: bold;
+    padding: 2px;
+}
+
+#equalizer {
+    border: 2px solid #8b4513;
+    border-radius: 15px;
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 rgba(45, 24, 16, 230), stop:1 rgba(74, 44, 26, 204));
+    margin: 4px 0px;
+}
+
+QPushButton {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #8b4513, stop:1 #a0522d);
+    color: #ffd4a3;
+    border: 2px solid #654321;
+    border-radius: 20px;
+    padding: 6px 12px;
+    font-size: 14px;
+    font-weight: bold;
+    min-width: 30px;
+    min-height: 30px;
+}
+
+QPushButton:hover {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #a0522d, stop:1 #cd853f);
+}
+
+QPushButton:pressed {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #654321, stop:1 #8b4513);
+}
+
+#play_button {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #ff6b6b, stop:1 #ff9999);
+    color: #2d1810;
+    border-color: #ff4757;
+}
+
+#play_button:hover {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #ff9999, stop:1 #ffb3b3);
+}
+
+#nav_button {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #6b3e2a, stop:1 #8b4513);
+    padding: 6px 10px;
+}
+
+#nav_button:pressed {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #4a2c1a, stop:1 #8b4513);
+}
+
+#volume_label, #opacity_label {
+    color: #ffd4a3;
+    font-size: 15px;
+    font-weight: bold;
+}
+#volume_slider, #opacity_slider {
+    min-width: 80px;
+}
+#volume_percent, #opacity_percent {
+    color: #ffd4a3;
+    font-size: 11px;
+    font-weight: bold;
+}
+"""
+
+# Упрощённые стили: однотонные фоны вместо градиентов, которые
+# растеризуются заново при каждой перерисовке (медленные дисплеи, VNC)
+LOW_FX_STYLE_SHEET = """
+QMainWindow {
+    background: #2d1810;
+}
+
+#equalizer {
+    background: #2d1810;
+}
+
+QPushButton {
+    background: #8b4513;
+}
+
+QPushButton:hover {
+    background: #a0522d;
+}
+
+QPushButton:pressed {
+    background: #654321;
+}
+
+#play_button {
+    background: #ff6b6b;
+}
+
+#play_button:hover {
+    background: #ff9999;
+}
+
+#nav_button {
+    background: #6b3e2a;
+}
+
+#nav_button:pressed {
+    background: #4a2c1a;
+}
+"""
 
 class SpotifyMiniPlayer(QMainWindow):
     """Главное окно мини-плеера"""
@@ -526,9 +1341,28 @@ class SpotifyMiniPlayer(QMainWindow):
         # Переменные для управления
         self.current_volume = 0.5
         self.current_opacity = 0.8
+        self.low_fx = os.environ.get('SPOTIFY_MINI_LOW_FX') == '1'
+        self._last_title = self._last_artist = self._last_status = self._last_play = None
+        self._last_info_key = None
+        self._last_art_url = None
+        self._art_shown = False
         
         # Универсальный медиа-контроллер
         self.media_controller = MediaController()
+        self.album_art = AlbumArtLoader()
+        self.album_art.ready.connect(self.on_album_art_ready)
+        
+        # Слайдеры шлют valueChanged на каждый пиксель перетаскивания,
+        # поэтому значения применяются не чаще раза за интервал таймера
+        self.volume_timer = QTimer()
+        self.volume_timer.setSingleShot(True)
+        self.volume_timer.setInterval(100)
+        self.volume_timer.timeout.connect(self.apply_volume)
+        
+        self.opacity_timer = QTimer()
+        self.opacity_timer.setSingleShot(True)
+        self.opacity_timer.setInterval(16)
+        self.opacity_timer.timeout.connect(self.apply_opacity)
         
         # Создание интерфейса
         self.create_ui()
@@ -536,10 +1370,26 @@ class SpotifyMiniPlayer(QMainWindow):
         # Применение стилей
         self.apply_styles()
         
-        # Обновление данных
+        # Обновление данных.
+        # Плееры шлют PropertiesChanged пачками (при перемотке и смене
+        # трека), поэтому UI обновляется не чаще раза в 100 мс
+        self._pending_info = None
+        self.track_changed_timer = QTimer()
+        self.track_changed_timer.setSingleShot(True)
+        self.track_changed_timer.setInterval(100)
+        self.track_changed_timer.timeout.connect(self.apply_pending_track_info)
+        self.media_controller.track_changed.connect(self.on_track_changed)
+        
         self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_track_info)
-        self.update_timer.start(1000)
+        if self.media_controller.pushes_updates:
+            # Основной источник - сигналы контроллера; редкая сверка
+            # страхует от плееров, которые теряют PropertiesChanged
+            self.update_timer.timeout.connect(self.media_controller.refresh)
+            self.update_timer.start(5000)
+        else:
+            self.update_timer.timeout.connect(self.update_track_info)
+            self.update_timer.start(1000)
+        self.update_track_info()
         
         # Добавление информации о системе в статус
         self.show_system_info()
@@ -675,118 +1525,83 @@ class SpotifyMiniPlayer(QMainWindow):
     
     def apply_styles(self):
         """Применение стилей"""
-        style = """
-        QMainWindow {
-            background: qradialgradient(cx:0.3, cy:0.2, radius:0.7, fx:0.3, fy:0.2, stop:0 #4a2c1a, stop:1 #2d1810);
-            border: 3px solid #8b4513;
-            border-radius: 20px;
-        }
-        
-        #track_title {
-            color: #ffd4a3;
-            font-size: 13px;
-            font-weight: bold;
-            padding: 2px;
-        }
+        style = STYLE_SHEET + LOW_FX_STYLE_SHEET if self.low_fx else STYLE_SHEET
         
-        #track_artist {
-            color: #d4a574;
-            font-size: 11px;
-            font-style: italic;
-            padding: 2px;
-        }
-        
-        #status_label {
-            color: #ff9999;
-            font-size: 10px;
-            font-weight: bold;
-            padding: 2px;
-        }
-        
-        #equalizer {
-            border: 2px solid #8b4513;
-            border-radius: 15px;
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 rgba(45, 24, 16, 230), stop:1 rgba(74, 44, 26, 204));
-            margin: 4px 0px;
-        }
-        
-        QPushButton {
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #8b4513, stop:1 #a0522d);
-            color: #ffd4a3;
-            border: 2px solid #654321;
-            border-radius: 20px;
-            padding: 6px 12px;
-            font-size: 14px;
-            font-weight: bold;
-            min-width: 30px;
-            min-height: 30px;
-        }
-        
-        QPushButton:hover {
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #a0522d, stop:1 #cd853f);
-        }
-        
-        QPushButton:pressed {
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #654321, stop:1 #8b4513);
-        }
+        # Таблица стилей разбирается один раз на всё приложение,
+        # а не заново для каждого созданного окна
+        app = QApplication.instance()
+        if app.styleSheet() != style:
+            app.setStyleSheet(style)
+
+    def update_track_info(self):
+        """Запрос информации о текущем треке и обновление UI"""
+        self.apply_track_info(self.media_controller.get_track_info())
+
+    def on_track_changed(self, info):
+        self._pending_info = info
+        if not self.track_changed_timer.isActive():
+            self.track_changed_timer.start()
+
+    def apply_pending_track_info(self):
+        self.apply_track_info(self._pending_info)
+
+    def apply_track_info(self, info):
+        """Обновление UI по информации о треке"""
+        # Опрос и сверка в основном приносят те же данные - тогда
+        # виджеты не трогаются вовсе
+        info_key = (info.get('title'), info.get('artist'), info.get('status'),
+                    info.get('is_playing'), info.get('album_art'))
+        if info_key == self._last_info_key:
+            return
+        self._last_info_key = info_key
         
-        #play_button {
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #ff6b6b, stop:1 #ff9999);
-            color: #2d1810;
-            border-color: #ff4757;
-        }
+        # setText заново раскладывает текст (с эмодзи и CJK это заметно),
+        # поэтому подписи обновляются только при реальном изменении
+        title = info.get('title', 'Unknown')
+        if title != self._last_title:
+            self.track_title.setText(title)
+            self._last_title = title
         
-        #play_button:hover {
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #ff9999, stop:1 #ffb3b3);
-        }
+        artist = info.get('artist', 'Unknown')
+        if artist != self._last_artist:
+            self.track_artist.setText(artist)
+            self._last_artist = artist
         
-        #nav_button {
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #6b3e2a, stop:1 #8b4513);
-            padding: 6px 10px;
-        }
+        status = info.get('status', 'Unknown')
+        if status != self._last_status:
+            self.status_label.setText(status)
+            self._last_status = status
         
-        #nav_button:pressed {
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #4a2c1a, stop:1 #8b4513);
-        }
-
-        #volume_label, #opacity_label {
-            color: #ffd4a3;
-            font-size: 15px;
-            font-weight: bold;
-        }
-        #volume_slider, #opacity_slider {
-            min-width: 80px;
-        }
-        #volume_percent, #opacity_percent {
-            color: #ffd4a3;
-            font-size: 11px;
-            font-weight: bold;
-        }
-        """
-        self.setStyleSheet(style)
-
-    def update_track_info(self):
-        """Обновление информации о текущем треке и UI"""
-        info = self.media_controller.get_track_info()
-        self.track_title.setText(info.get('title', 'Unknown'))
-        self.track_artist.setText(info.get('artist', 'Unknown'))
-        self.status_label.setText(info.get('status', 'Unknown'))
         is_playing = info.get('is_playing', False)
-        self.equalizer.set_playing(is_playing)
-        self.play_button.setText("⏸" if is_playing else "▶")
+        if is_playing != self._last_play:
+            self.equalizer.set_playing(is_playing)
+            self.play_button.setText("⏸" if is_playing else "▶")
+            self._last_play = is_playing
 
-        # Обновление обложки, если есть ссылка
+        # Обновление обложки только при смене ссылки на неё
         cover_url = info.get('album_art')
+        if cover_url == self._last_art_url:
+            return
+        self._last_art_url = cover_url
+        
+        pixmap = self.album_art.cached(cover_url) if cover_url else None
+        if pixmap is not None:
+            self.album_cover.setPixmap(pixmap)
+            self._art_shown = True
+            return
+        
+        # Пустую обложку не перерисовываем и не создаём для неё QPixmap
+        if self._art_shown:
+            self.album_cover.clear()
+            self._art_shown = False
         if cover_url:
-            try:
-                data = urllib.request.urlopen(cover_url).read()
-                pixmap = QPixmap()
-                pixmap.loadFromData(data)
-                self.album_cover.setPixmap(pixmap.scaled(60, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            except Exception:
-                self.album_cover.setPixmap(QPixmap())
-        else:
-            self.album_cover.setPixmap(QPixmap())
+            self.album_art.request(cover_url)
+
+    def on_album_art_ready(self, url, pixmap):
+        # Пока обложка грузилась, трек мог смениться
+        if url == self._last_art_url:
+            self.album_cover.setPixmap(pixmap)
+            self._art_shown = True
 
     def on_previous_clicked(self):
         self.media_controller.previous_track()
@@ -803,15 +1618,25 @@ class SpotifyMiniPlayer(QMainWindow):
     def on_volume_changed(self, value):
         self.current_volume = value / 100.0
         self.volume_percent_label.setText(f"{value}%")
+        if not self.volume_timer.isActive():
+            self.volume_timer.start()
+
+    def apply_volume(self):
         self.media_controller.set_volume(self.current_volume)
 
     def on_opacity_changed(self, value):
         self.current_opacity = value / 100.0
         self.opacity_percent_label.setText(f"{value}%")
+        if not self.opacity_timer.isActive():
+            self.opacity_timer.start()
+
+    def apply_opacity(self):
         self.setWindowOpacity(self.current_opacity)
 
 def main():
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
     app = QApplication(sys.argv)
+    warm_up_equalizer_step()
     player = SpotifyMiniPlayer()
     player.show()
     sys.exit(app.exec())